@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 RTI AD-8x <-> MQTT bridge
-Version 1.8.0 (2025-11-15)
+Version 1.13.0 (2026-10-19)
 
 - NEW: Added instrumentation and diagnostics, mirroring the vantage-bridge.
   The bridge now publishes CPU, memory, uptime, and connection status
@@ -17,11 +17,44 @@ Version 1.8.0 (2025-11-15)
   as hardware ignores these commands when the zone is off.
 - REFINED (v1.8.0): Increased default VOL_COALESCE_SEC to 1.2s
   to better handle rapid button taps.
+- NEW (v1.9.0): State-aware command elision. Setters and coalesced
+  flushes skip the amp round trip when fresh (< STATE_FRESH_SEC old)
+  zone state already matches the request.
+- NEW (v1.9.0): ALL OFF only targets zones not known to be off, picks
+  per-zone PWR00 vs *ZALLPWR00 by ALL_OFF_ZALL_MIN_ZONES, and only
+  publishes optimistic states for zones that changed.
+- NEW (v1.10.0): Optional local HTTP + WebSocket API (LOCAL_API_PORT,
+  requires aiohttp). GET /api/state returns a snapshot of every zone,
+  /api/ws streams state diffs as they happen, and both /api/ws and
+  POST /api/command accept the same commands as MQTT.
+- NEW (v1.11.0): Hot config reload. AMPS, ZONE_NAMES and timing values
+  can live in a JSON file (BRIDGE_CONFIG) that is re-read on SIGHUP or
+  a message to '<base>/bridge/reload'. Only changed amps are restarted
+  and only affected zones get their discovery republished.
+- NEW (v1.12.0): Bounded outbound publish buffer. While the broker is
+  down, retained messages are kept latest-value-wins per topic (at most
+  PUB_BUFFER_MAX topics) and flushed in one burst on reconnect, instead
+  of being lost while paho has no socket.
+- NEW (v1.13.0): MQTT 5 features. Commands carrying a ResponseTopic get
+  their result published there with the request's CorrelationData (the
+  legacy '<amp>/zone/ack/<cmd>' topics are still published and mean
+  "accepted"; the response means "applied", so for coalesced volume/tone
+  commands it arrives after the flush). Topic aliases go to each zone's
+  JSON and volume topics first, then first-come up to the broker's
+  TopicAliasMaximum, and non-retained diagnostics/acks carry a
+  MSG_EXPIRY_SEC expiry. Retained reload requests are ignored.
 """
 
-import os, sys, time, json, random, signal, socket, logging, traceback, threading
-from typing import Optional, Tuple
+import os, sys, time, json, hmac, random, signal, socket, asyncio, logging, traceback, threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
 import paho.mqtt.client as mqtt
+from paho.mqtt.properties import Properties
+from paho.mqtt.packettypes import PacketTypes
+try:
+    from aiohttp import web, WSMsgType # OPTIONAL: only needed for the local API
+except ImportError:
+    web = None
 # --- INSTRUMENTATION ---
 import psutil # REQUIRED FOR METRICS
 # --- INSTRUMENTATION ---
@@ -70,11 +103,62 @@ DUMP_RAW_CHUNKS   = os.getenv("DUMP_RAW_CHUNKS", "1") not in ("0", "false", "Fal
 VOL_COALESCE_SEC        = float(os.getenv("VOL_COALESCE_SEC", "1.2"))
 VOL_ECHO_SUPPRESS_SEC   = float(os.getenv("VOL_ECHO_SUPPRESS_SEC", "1.00"))
 
+# --- LOCAL API ---
+LOCAL_API_HOST          = os.getenv("LOCAL_API_HOST", "127.0.0.1")  # non-loopback binds require LOCAL_API_TOKEN
+LOCAL_API_PORT          = int(os.getenv("LOCAL_API_PORT", "0"))  # 0 disables the local HTTP/WebSocket API
+LOCAL_API_TOKEN         = os.getenv("LOCAL_API_TOKEN", "")  # if set, required as Bearer token or ?token=
+LOCAL_API_CLIENT_QUEUE  = 256  # per-WebSocket outbound backlog before a slow client is dropped
+# --- LOCAL API ---
+
+# --- PUBLISH BUFFER ---
+PUB_BUFFER_MAX          = int(os.getenv("PUB_BUFFER_MAX", "1024"))  # max distinct retained topics held while MQTT is down; <= 0 disables buffering
+MSG_EXPIRY_SEC          = int(os.getenv("MSG_EXPIRY_SEC", "60"))  # MQTT 5 expiry for non-retained diagnostics/acks; 0 = none
+# --- PUBLISH BUFFER ---
+
+# --- COMMAND ELISION ---
+# Wall keypads can change a zone between polls, so known state is only trusted briefly
+# (never longer than POLL_INTERVAL) -- long enough to absorb repeated automation triggers.
+STATE_FRESH_SEC         = float(os.getenv("STATE_FRESH_SEC", "5.0"))  # 0 disables elision
+ALL_OFF_ZALL_MIN_ZONES  = int(os.getenv("ALL_OFF_ZALL_MIN_ZONES", "2"))  # use *ZALL at/above this many zones
+# --- COMMAND ELISION ---
+
 # --- INSTRUMENTATION ---
 HEALTH_CHECK_INTERVAL = 30.0 # Interval for sending metrics and heartbeat
 # --- INSTRUMENTATION ---
 
+# --- HOT RELOAD ---
+# Optional JSON file, re-read on SIGHUP or '<base>/bridge/reload':
+#   {"zone_names": {"amp1": {"1": "Kitchen"}},
+#    "tuning": {"POLL_INTERVAL": 20.0, "VOL_COALESCE_SEC": 1.2}}
+# zone_names and tuning override the values above per zone / per key; anything
+# left out keeps its built-in value. "amps", if present, is the complete amp list.
+CONFIG_FILE = os.getenv("BRIDGE_CONFIG", "")
+TUNABLES = { # config/env key -> (module constant, type)
+    "POLL_INTERVAL": ("POLL_INTERVAL_SEC", float),
+    "CONNECT_TIMEOUT": ("CONNECT_TIMEOUT", float),
+    "PER_CMD_TIMEOUT": ("PER_CMD_TIMEOUT", float),
+    "POST_SEND_SETTLE": ("POST_SEND_SETTLE", float),
+    "INTER_CMD_SLEEP": ("INTER_CMD_SLEEP", float),
+    "SET_RETRIES": ("SET_RETRIES", int),
+    "RETRY_SLEEP": ("RETRY_SLEEP", float),
+    "VOL_COALESCE_SEC": ("VOL_COALESCE_SEC", float),
+    "VOL_ECHO_SUPPRESS_SEC": ("VOL_ECHO_SUPPRESS_SEC", float),
+    "STATE_FRESH_SEC": ("STATE_FRESH_SEC", float),
+    "ALL_OFF_ZALL_MIN_ZONES": ("ALL_OFF_ZALL_MIN_ZONES", int),
+    "HEALTH_CHECK_INTERVAL": ("HEALTH_CHECK_INTERVAL", float),
+    "PUB_BUFFER_MAX": ("PUB_BUFFER_MAX", int),
+    "MSG_EXPIRY_SEC": ("MSG_EXPIRY_SEC", int),
+}
+_DEFAULT_AMPS = dict(AMPS)
+_DEFAULT_ZONE_NAMES = {a: dict(zs) for a, zs in ZONE_NAMES.items()}
+_DEFAULT_TUNING = {name: globals()[name] for name, _ in TUNABLES.values()}
+# --- HOT RELOAD ---
+
 EOL, ESC2 = b"\r", b"\x1b" + b"2"
+COALESCED_CMDS = ("volume", "bass", "treble", "bass_up", "bass_down", "treble_up", "treble_down")
+ZONE_STATE_KEYS = ("power", "mute", "source", "vol_0_75", "bass", "treble")
+PENDING_TIMERS = {"power": "vol_timer", "vol_0_75": "vol_timer", "bass": "bass_timer", "treble": "treble_timer"} # field -> coalesce timer that can change it (VOL also powers on)
+ZONE_ENTITIES = (("switch", "power"), ("switch", "mute"), ("number", "volume"), ("select", "source"), ("number", "bass"), ("number", "treble"))
 
 def zz(n: int) -> str: return f"{n:02d}"
 
@@ -108,14 +192,137 @@ def zone_object_id(amp_key: str, zone: int, suffix: str) -> str:
     name = ZONE_NAMES.get(amp_key, {}).get(zone, f"Zone {zone}")
     return slugify(f"ad8x_{amp_key}_{name}_{suffix}")
 
+def load_config_file(path: str) -> Optional[dict]:
+    """Reads a BRIDGE_CONFIG file merged over the built-in defaults; None on any error."""
+    try:
+        with open(path) as f: raw = json.load(f)
+        amps = {a: (str(v[0]), int(v[1])) for a, v in raw.get("amps", _DEFAULT_AMPS).items()}
+        # Merge per zone: renaming one zone must not reset its neighbours (uniq_id derives from the name)
+        zone_names = {a: dict(zs) for a, zs in _DEFAULT_ZONE_NAMES.items()}
+        for a, zs in raw.get("zone_names", {}).items():
+            zone_names.setdefault(a, {}).update({int(z): str(n) for z, n in zs.items()})
+        tuning = dict(_DEFAULT_TUNING)
+        for key, val in raw.get("tuning", {}).items():
+            if key not in TUNABLES: log.warning(f"[Config] Ignoring unknown tuning key '{key}'"); continue
+            name, cast = TUNABLES[key]; tuning[name] = cast(val)
+        return {"amps": amps, "zone_names": zone_names, "tuning": tuning}
+    except Exception as e:
+        log.error(f"[Config] Failed to load {path}: {e}")
+        return None
+
+def apply_tuning(tuning: dict) -> dict:
+    """Swaps in new timing constants; returns only the ones that changed."""
+    changed = {name: v for name, v in tuning.items() if globals().get(name) != v}
+    globals().update(changed)
+    return changed
+
+class PublishBuffer:
+    """
+    Front for mqtt.Client.publish. Connected: straight through. Disconnected:
+    retained messages are held latest-value-wins per topic (bounded by
+    PUB_BUFFER_MAX, oldest topic evicted first) and non-retained ones are
+    dropped, since acks/CPU readings are worthless by the time we reconnect.
+    "Connected" means on_connect has run for the current session (paho flags
+    itself connected before that), and until keepalive notices a half-open
+    link publishes still go straight into paho's own queue.
+
+    Also owns the MQTT 5 publish properties: topic aliases for hot topics
+    (assigned first-come up to the broker's TopicAliasMaximum, forgotten on
+    disconnect) and message expiry.
+    """
+    def __init__(self, client: mqtt.Client):
+        self.client = client
+        self.lock = threading.Lock()
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict() # topic -> (payload, properties)
+        self.superseded = 0 # buffered values replaced by a newer one for the same topic
+        self.dropped = 0    # non-retained messages, or topics evicted by the size bound
+        self.peak = 0       # high-water mark of depth(); depth itself is ~0 whenever we can report it
+        self.last_flush = 0 # topics sent by the most recent reconnect flush
+        self._alias_max = 0
+        self._aliases: dict[str, int] = {}
+        self._announced: set = set() # topics whose alias the broker has seen on this connection
+        self._ready = False # True between on_connect and on_disconnect
+
+    def depth(self) -> int: return len(self._pending)
+
+    def on_connected(self, alias_max: int, preferred=()) -> int:
+        """
+        Call from on_connect with the CONNACK's TopicAliasMaximum; flushes the buffer.
+        `preferred` topics are reserved aliases first (brokers often allow only ~10),
+        other alias=True topics get whatever slots are left.
+        """
+        with self.lock:
+            self._alias_max = alias_max; self._announced = set()
+            self._aliases = {t: n for n, t in enumerate(list(dict.fromkeys(preferred))[:alias_max], start=1)}
+            sent = self._flush_locked()
+            self._ready = True
+        return sent
+
+    def on_disconnected(self):
+        """Aliases only live for one connection; buffer until on_connected runs again."""
+        with self.lock:
+            self._ready = False; self._alias_max = 0; self._aliases = {}; self._announced = set()
+
+    def _send(self, topic: str, payload, retain: bool, alias: bool, expiry: int, properties: Optional[Properties]):
+        if expiry:
+            properties = properties or Properties(PacketTypes.PUBLISH)
+            properties.MessageExpiryInterval = int(expiry)
+        if alias and self._alias_max:
+            n = self._aliases.get(topic)
+            if n is None and len(self._aliases) < self._alias_max:
+                n = self._aliases[topic] = len(self._aliases) + 1
+            if n is not None:
+                properties = properties or Properties(PacketTypes.PUBLISH)
+                properties.TopicAlias = n
+                if topic in self._announced: topic = "" # alias already known to the broker
+                else: self._announced.add(topic) # first use sends topic + alias
+        return self.client.publish(topic, payload, retain=retain, properties=properties)
+
+    def publish(self, topic: str, payload=None, retain: bool = False, alias: bool = False, expiry: int = 0, properties: Optional[Properties] = None):
+        with self.lock:
+            # Anything still pending must go first, so only bypass once flushed
+            if self._ready and not self._pending and self.client.is_connected():
+                return self._send(topic, payload, retain, alias, expiry, properties)
+            if not retain:
+                self.dropped += 1; return None
+            limit = max(0, PUB_BUFFER_MAX)
+            if not limit:
+                self.dropped += 1; return None
+            if topic in self._pending:
+                self.superseded += 1; self._pending.move_to_end(topic)
+            else:
+                self._trim_locked(limit - 1)
+            self._pending[topic] = (payload, properties)
+            self.peak = max(self.peak, len(self._pending))
+            return None
+
+    def _trim_locked(self, limit: int):
+        while len(self._pending) > max(0, limit):
+            self._pending.popitem(last=False); self.dropped += 1
+
+    def trim(self):
+        """Re-applies PUB_BUFFER_MAX, e.g. after a reload lowered it."""
+        with self.lock: self._trim_locked(PUB_BUFFER_MAX)
+
+    def _flush_locked(self) -> int:
+        """Sends every buffered topic once; caller holds self.lock."""
+        pending, self._pending = self._pending, OrderedDict()
+        for topic, (payload, properties) in pending.items():
+            self._send(topic, payload, True, False, 0, properties)
+        if pending:
+            self.last_flush = len(pending)
+            log.info(f"[Bridge] Flushed {len(pending)} buffered publishes (superseded so far: {self.superseded})")
+        return len(pending)
+
 class AmpSession(threading.Thread):
-    def __init__(self, amp_name: str, addr: Tuple[str, int], mqttc: mqtt.Client):
+    def __init__(self, amp_name: str, addr: Tuple[str, int], mqttc: PublishBuffer):
         super().__init__(daemon=True)
         self.amp_name = amp_name
         self.addr = addr
         self.mqttc = mqttc
         self.sock: Optional[socket.socket] = None
         self.stop_flag = threading.Event()
+        self.wake = threading.Event() # interrupts the poll sleep, e.g. after POLL_INTERVAL is reloaded
         self.lock = threading.Lock()
         self.connected = False
         self._rbuf = b""
@@ -124,6 +331,8 @@ class AmpSession(threading.Thread):
         self._zone_states: dict[int, dict] = {}
         self._consecutive_failures = 0
         self._is_down_published = False
+        self.elided_cmds = 0
+        self.on_state: Optional[Callable[[str, int, dict], None]] = None # called with (amp, zone, changed fields)
 
     def _cleanup_socket(self):
         """Closes the socket and clears the buffer without resetting state."""
@@ -134,6 +343,7 @@ class AmpSession(threading.Thread):
             self._rbuf = b""
 
     def _connect(self) -> bool:
+        if self.stop_flag.is_set(): return False # never reopen a stopped (removed/re-addressed) amp
         self._cleanup_socket()
         try:
             log.info(f"[{self.amp_name}] connecting to {self.addr[0]}:{self.addr[1]}")
@@ -211,6 +421,7 @@ class AmpSession(threading.Thread):
     def _send_only(self, cmd_ascii: str) -> bool:
         """Fire-and-forget send, used for optimistic updates."""
         with self.lock:
+            if self.stop_flag.is_set(): return False
             if not self.connected and not self._connect(): return False
             try:
                 self._send_ascii(cmd_ascii)
@@ -222,41 +433,112 @@ class AmpSession(threading.Thread):
                 return False
 
     def _topic(self, *parts) -> str: return "/".join([MQTT_BASE, self.amp_name, *[str(p) for p in parts]])
+
+    def _emit_state(self, zone: int, diff: dict):
+        if "vol_0_75" in diff: self._zone_states.setdefault(zone, {})["last_emitted_vol"] = diff["vol_0_75"]
+        if not (diff and self.on_state): return
+        try: self.on_state(self.amp_name, zone, diff)
+        except Exception as e: log.warning(f"[{self.amp_name}] state listener error: {e}")
+
+    def snapshot(self) -> dict:
+        """Public per-zone state (no timers/targets) for local API clients."""
+        return {z: {k: buf[k] for k in ZONE_STATE_KEYS if k in buf} for z, buf in sorted(list(self._zone_states.items()))}
+
     def _pub_availability(self, state: str): self.mqttc.publish(self._topic("status"), state, retain=True)
 
     def _pub_zone_full(self, z: int, sta_data: dict, tone_data: dict):
         base = self._topic("zone", z)
-        self.mqttc.publish(f"{base}/power", "on" if sta_data["power"] else "off", retain=True)
-        self.mqttc.publish(f"{base}/mute", "on" if sta_data["mute"] else "off", retain=True)
-        self.mqttc.publish(f"{base}/source", str(sta_data["source"]), retain=True)
-        self.mqttc.publish(f"{base}/bass", str(tone_data["bass"]), retain=True)
-        self.mqttc.publish(f"{base}/treble", str(tone_data["treble"]), retain=True)
+        self.mqttc.publish(f"{base}/power", "on" if sta_data["power"] else "off", retain=True, alias=True)
+        self.mqttc.publish(f"{base}/mute", "on" if sta_data["mute"] else "off", retain=True, alias=True)
+        self.mqttc.publish(f"{base}/source", str(sta_data["source"]), retain=True, alias=True)
+        self.mqttc.publish(f"{base}/bass", str(tone_data["bass"]), retain=True, alias=True)
+        self.mqttc.publish(f"{base}/treble", str(tone_data["treble"]), retain=True, alias=True)
         buf = self._zone_states.setdefault(z, {})
-        if time.time() >= buf.get("suppress_until", 0.0):
+        suppressed = time.time() < buf.get("suppress_until", 0.0)
+        if not suppressed:
             vv = sta_data["vol_0_75"]
             if buf.get("last_published_vol") != vv:
-                self.mqttc.publish(f"{base}/volume", str(vv), retain=True)
+                self.mqttc.publish(f"{base}/volume", str(vv), retain=True, alias=True)
                 buf["last_published_vol"] = vv
         combined = {**sta_data, **tone_data}
-        self.mqttc.publish(base, json.dumps(combined, separators=(",", ":")), retain=True)
+        self.mqttc.publish(base, json.dumps(combined, separators=(",", ":")), retain=True, alias=True)
+        diff = {k: combined[k] for k in ZONE_STATE_KEYS if k != "vol_0_75" and buf.get(k) != combined[k]}
+        # Like the MQTT volume topic, compare against what clients were last told (which may
+        # be an optimistic target), not against buf, so a SET that didn't land gets corrected
+        if not suppressed and buf.get("last_emitted_vol") != combined["vol_0_75"]: diff["vol_0_75"] = combined["vol_0_75"]
         buf.update(combined)
+        buf["state_ts"] = time.time()
+        self._emit_state(z, diff)
 
     def _pub_volume_only(self, zone: int, v: int):
         buf = self._zone_states.setdefault(zone, {})
         if buf.get("last_published_vol") != v:
-            self.mqttc.publish(self._topic("zone", zone, "volume"), str(v), retain=True)
+            self.mqttc.publish(self._topic("zone", zone, "volume"), str(v), retain=True, alias=True)
             buf["last_published_vol"] = v
+        if buf.get("last_emitted_vol") != v: self._emit_state(zone, {"vol_0_75": v})
 
     def _is_zone_on(self, zone: int) -> bool:
         return self._zone_states.get(zone, {}).get("power", False)
 
-    def set_power(self, zone: int, on: bool) -> bool: return self._send_and_confirm(zone, f"*ZN{zz(zone)}PWR{'01' if on else '00'}")
-    def set_mute(self, zone: int, on: bool) -> bool: return self._send_and_confirm(zone, f"*ZN{zz(zone)}MUT{'01' if on else '00'}")
+    # --- COMMAND ELISION ---
+
+    def _is_fresh(self, zone: int, keys=ZONE_STATE_KEYS) -> bool:
+        """True if the zone's last confirmed STA/SET is recent enough to trust for `keys`."""
+        if STATE_FRESH_SEC <= 0: return False
+        buf = self._zone_states.get(zone, {})
+        # A coalesced write still waiting to fire means those fields are about to change.
+        # The timer running this check (a flush deciding whether to send) doesn't count.
+        me = threading.current_thread()
+        timers = {buf.get(PENDING_TIMERS[k]) for k in keys if k in PENDING_TIMERS}
+        if any(t and t is not me and t.is_alive() for t in timers):
+            return False
+        return (time.time() - buf.get("state_ts", 0.0)) < min(STATE_FRESH_SEC, POLL_INTERVAL_SEC)
+
+    def _already(self, zone: int, **want) -> bool:
+        """True (and counted) if fresh known state already matches every key in `want`."""
+        if not self._is_fresh(zone, want.keys()): return False
+        buf = self._zone_states.get(zone, {})
+        if any(buf.get(k) != v for k, v in want.items()): return False
+        self.elided_cmds += 1
+        log.info(f"[{self.amp_name}] Elided command for zone {zz(zone)}; already {want}")
+        return True
+
+    def zones_needing_off(self) -> list:
+        """Zones not known (freshly) to be off already."""
+        return [z for z in range(1, 9) if not (self._is_fresh(z, ("power",)) and self._zone_states.get(z, {}).get("power") is False)]
+
+    def all_zones_off(self) -> list:
+        """Turns off every zone that needs it; returns the zones that were commanded."""
+        zones = self.zones_needing_off()
+        if not zones:
+            self.elided_cmds += 1
+            log.info(f"[{self.amp_name}] ALL OFF elided; all zones already off")
+            return []
+        if len(zones) >= ALL_OFF_ZALL_MIN_ZONES:
+            if not self._send_only("*ZALLPWR00"): return []
+        else:
+            zones = [z for z in zones if self._send_only(f"*ZN{zz(z)}PWR00")]
+        for z in zones:
+            # Unconfirmed (fire-and-forget), so never let it count as fresh for elision
+            self._zone_states.setdefault(z, {}).update({"power": False, "mute": False, "state_ts": 0.0})
+            self._emit_state(z, {"power": False, "mute": False})
+        return zones
+
+    # --- END COMMAND ELISION ---
+
+    def set_power(self, zone: int, on: bool) -> bool:
+        if self._already(zone, power=on): return True
+        return self._send_and_confirm(zone, f"*ZN{zz(zone)}PWR{'01' if on else '00'}")
+
+    def set_mute(self, zone: int, on: bool) -> bool:
+        if self._already(zone, mute=on): return True
+        return self._send_and_confirm(zone, f"*ZN{zz(zone)}MUT{'01' if on else '00'}")
+
     def toggle_mute(self, zone: int) -> bool: return self._send_and_confirm(zone, f"*ZN{zz(zone)}MUT02")
-    def all_zones_off_optimistic(self) -> bool: return self._send_only("*ZALLPWR00")
     
     def set_source(self, zone: int, source: int) -> bool:
         if not self._is_zone_on(zone): log.warning(f"[{self.amp_name}] Ignoring source change for zone {zone}; power is off."); return False
+        if self._already(zone, source=source): return True
         return self._send_and_confirm(zone, f"*ZN{zz(zone)}SRC{zz(source)}")
     
     def volume_up(self, zone: int) -> bool:
@@ -267,103 +549,130 @@ class AmpSession(threading.Thread):
         if not self._is_zone_on(zone): log.warning(f"[{self.amp_name}] Ignoring volume down for zone {zone}; power is off."); return False
         return self._send_and_confirm(zone, f"*ZN{zz(zone)}VOLDN")
 
-    def bass_up(self, zone: int) -> bool:
+    def bass_up(self, zone: int, on_done: Optional[Callable[[bool], None]] = None) -> bool:
         if not self._is_zone_on(zone): return False
         cur = self._zone_states.get(zone, {}).get("bass", 0)
-        return self.set_bass(zone, min(12, cur + 2))
+        return self.set_bass(zone, min(12, cur + 2), on_done)
 
-    def bass_down(self, zone: int) -> bool:
+    def bass_down(self, zone: int, on_done: Optional[Callable[[bool], None]] = None) -> bool:
         if not self._is_zone_on(zone): return False
         cur = self._zone_states.get(zone, {}).get("bass", 0)
-        return self.set_bass(zone, max(-12, cur - 2))
+        return self.set_bass(zone, max(-12, cur - 2), on_done)
 
-    def treble_up(self, zone: int) -> bool:
+    def treble_up(self, zone: int, on_done: Optional[Callable[[bool], None]] = None) -> bool:
         if not self._is_zone_on(zone): return False
         cur = self._zone_states.get(zone, {}).get("treble", 0)
-        return self.set_treble(zone, min(12, cur + 2))
+        return self.set_treble(zone, min(12, cur + 2), on_done)
 
-    def treble_down(self, zone: int) -> bool:
+    def treble_down(self, zone: int, on_done: Optional[Callable[[bool], None]] = None) -> bool:
         if not self._is_zone_on(zone): return False
         cur = self._zone_states.get(zone, {}).get("treble", 0)
-        return self.set_treble(zone, max(-12, cur - 2))
+        return self.set_treble(zone, max(-12, cur - 2), on_done)
 
     # --- BATCHING / COALESCING FUNCTIONS ---
+    # Setters take an optional on_done(applied: bool). Every request absorbed into
+    # one coalesced write is told that write's outcome when the flush completes.
+
+    def _add_waiter(self, buf: dict, kind: str, on_done: Optional[Callable[[bool], None]]):
+        if on_done: buf.setdefault(f"{kind}_waiters", []).append(on_done)
+
+    def _resolve(self, zone: int, kind: str, ok: bool):
+        for cb in self._zone_states.get(zone, {}).pop(f"{kind}_waiters", []):
+            try: cb(ok)
+            except Exception as e: log.warning(f"[{self.amp_name}] {kind} completion callback error: {e}")
 
-    def set_volume(self, zone: int, v: int) -> bool:
+    def set_volume(self, zone: int, v: int, on_done: Optional[Callable[[bool], None]] = None) -> bool:
         # NOTE: This is our "power on" command, so it does NOT have a power check.
         v_clamped = max(0, min(75, int(v)))
         buf = self._zone_states.setdefault(zone, {}); buf["target_vol"] = v_clamped
         t = buf.get("vol_timer")
         if t and t.is_alive(): t.cancel()
+        self._add_waiter(buf, "vol", on_done)
         t = threading.Timer(VOL_COALESCE_SEC, self._flush_volume, args=(zone,))
         buf["vol_timer"] = t; t.start()
         return True
 
     def _flush_volume(self, zone: int):
         # NOTE: This is our "power on" command, so it does NOT have a power check.
-        buf = self._zone_states.get(zone, {}); target = buf.get("target_vol")
-        if target is None: return
-        cmd = f"*ZN{zz(zone)}VOL{zz(target)}"
-        log.info(f"[{self.amp_name}] Coalesced VOL zone {zz(zone)} -> {target}")
-        self._pub_volume_only(zone, target)
-        buf["suppress_until"] = time.time() + VOL_ECHO_SUPPRESS_SEC
-        ok = self._send_and_confirm(zone, cmd)
-        if not ok:
-            log.warning(f"[{self.amp_name}] Coalesced volume SET failed. Re-querying.")
-            self._send_and_confirm(zone, f"*ZN{zz(zone)}STA00")
-
-    def set_bass(self, zone: int, level: int) -> bool:
+        ok = False
+        try:
+            buf = self._zone_states.get(zone, {}); target = buf.get("target_vol")
+            if target is None: return
+            # Power-on via VOL only counts as a no-op if the zone is already on at that level
+            if self._already(zone, power=True, vol_0_75=target): ok = True; return
+            cmd = f"*ZN{zz(zone)}VOL{zz(target)}"
+            log.info(f"[{self.amp_name}] Coalesced VOL zone {zz(zone)} -> {target}")
+            self._pub_volume_only(zone, target)
+            buf["suppress_until"] = time.time() + VOL_ECHO_SUPPRESS_SEC
+            ok = self._send_and_confirm(zone, cmd)
+            if not ok:
+                log.warning(f"[{self.amp_name}] Coalesced volume SET failed. Re-querying.")
+                self._send_and_confirm(zone, f"*ZN{zz(zone)}STA00")
+        finally: self._resolve(zone, "vol", ok)
+
+    def set_bass(self, zone: int, level: int, on_done: Optional[Callable[[bool], None]] = None) -> bool:
         if not self._is_zone_on(zone): log.warning(f"[{self.amp_name}] Ignoring bass change for zone {zone}; power is off."); return False
         
         level_clamped = max(-12, min(12, int(level)))
         buf = self._zone_states.setdefault(zone, {}); buf["target_bass"] = level_clamped
         t = buf.get("bass_timer") 
         if t and t.is_alive(): t.cancel()
+        self._add_waiter(buf, "bass", on_done)
         t = threading.Timer(VOL_COALESCE_SEC, self._flush_bass, args=(zone,))
         buf["bass_timer"] = t; t.start()
         return True
 
     def _flush_bass(self, zone: int):
-        if not self._is_zone_on(zone): return # Check again in case zone was turned off
-        buf = self._zone_states.get(zone, {}); target = buf.get("target_bass")
-        if target is None: return
-        
-        cmd = f"*ZN{zz(zone)}BAS{_encode_tone(target)}"
-        log.info(f"[{self.amp_name}] Coalesced BASS zone {zz(zone)} -> {target}")
-        
-        ok = self._send_and_confirm(zone, cmd)
-        if not ok:
-            log.warning(f"[{self.amp_name}] Coalesced bass SET failed. Re-querying.")
-            self._send_and_confirm(zone, f"*ZN{zz(zone)}STA00")
+        ok = False
+        try:
+            if not self._is_zone_on(zone): return # Check again in case zone was turned off
+            buf = self._zone_states.get(zone, {}); target = buf.get("target_bass")
+            if target is None: return
+            if self._already(zone, bass=target): ok = True; return
+            
+            cmd = f"*ZN{zz(zone)}BAS{_encode_tone(target)}"
+            log.info(f"[{self.amp_name}] Coalesced BASS zone {zz(zone)} -> {target}")
+            
+            ok = self._send_and_confirm(zone, cmd)
+            if not ok:
+                log.warning(f"[{self.amp_name}] Coalesced bass SET failed. Re-querying.")
+                self._send_and_confirm(zone, f"*ZN{zz(zone)}STA00")
+        finally: self._resolve(zone, "bass", ok)
 
-    def set_treble(self, zone: int, level: int) -> bool:
+    def set_treble(self, zone: int, level: int, on_done: Optional[Callable[[bool], None]] = None) -> bool:
         if not self._is_zone_on(zone): log.warning(f"[{self.amp_name}] Ignoring treble change for zone {zone}; power is off."); return False
         
         level_clamped = max(-12, min(12, int(level)))
         buf = self._zone_states.setdefault(zone, {}); buf["target_treble"] = level_clamped
         t = buf.get("treble_timer") 
         if t and t.is_alive(): t.cancel()
+        self._add_waiter(buf, "treble", on_done)
         t = threading.Timer(VOL_COALESCE_SEC, self._flush_treble, args=(zone,))
         buf["treble_timer"] = t; t.start()
         return True
 
     def _flush_treble(self, zone: int):
-        if not self._is_zone_on(zone): return # Check again in case zone was turned off
-        buf = self._zone_states.get(zone, {}); target = buf.get("target_treble")
-        if target is None: return
-        
-        cmd = f"*ZN{zz(zone)}TRB{_encode_tone(target)}"
-        log.info(f"[{self.amp_name}] Coalesced TREBLE zone {zz(zone)} -> {target}")
-        
-        ok = self._send_and_confirm(zone, cmd)
-        if not ok:
-            log.warning(f"[{self.amp_name}] Coalesced treble SET failed. Re-querying.")
-            self._send_and_confirm(zone, f"*ZN{zz(zone)}STA00")
+        ok = False
+        try:
+            if not self._is_zone_on(zone): return # Check again in case zone was turned off
+            buf = self._zone_states.get(zone, {}); target = buf.get("target_treble")
+            if target is None: return
+            if self._already(zone, treble=target): ok = True; return
+            
+            cmd = f"*ZN{zz(zone)}TRB{_encode_tone(target)}"
+            log.info(f"[{self.amp_name}] Coalesced TREBLE zone {zz(zone)} -> {target}")
+            
+            ok = self._send_and_confirm(zone, cmd)
+            if not ok:
+                log.warning(f"[{self.amp_name}] Coalesced treble SET failed. Re-querying.")
+                self._send_and_confirm(zone, f"*ZN{zz(zone)}STA00")
+        finally: self._resolve(zone, "treble", ok)
 
     # --- END BATCHING ---
 
     def _send_and_confirm(self, zone: int, cmd_ascii: str) -> bool:
         with self.lock:
+            if self.stop_flag.is_set(): return False
             if not self.connected and not self._connect(): return False
             tries = 0
             while tries <= SET_RETRIES:
@@ -389,6 +698,7 @@ class AmpSession(threading.Thread):
 
     def _poll_once(self):
         with self.lock:
+            if self.stop_flag.is_set(): return False
             if not self.connected and not self._connect():
                 self._handle_poll_failure()
                 return False
@@ -439,18 +749,38 @@ class AmpSession(threading.Thread):
         while not self.stop_flag.is_set():
             if self._poll_once():
                 backoff = 1.0
-                time.sleep(POLL_INTERVAL_SEC)
+                self._sleep_poll_interval()
             else:
-                time.sleep(backoff); backoff = min(30.0, backoff * 2)
+                self.stop_flag.wait(backoff); backoff = min(30.0, backoff * 2)
 
-    def stop(self): self.stop_flag.set(); self._close()
+    def _sleep_poll_interval(self):
+        # Re-evaluate the deadline on every wake so a reloaded POLL_INTERVAL applies to the current sleep
+        start = time.monotonic()
+        while not self.stop_flag.is_set():
+            remaining = POLL_INTERVAL_SEC - (time.monotonic() - start)
+            if remaining <= 0: return
+            self.wake.wait(remaining); self.wake.clear()
+
+    def stop(self):
+        self.stop_flag.set(); self.wake.set()
+        for zone, buf in list(self._zone_states.items()):
+            for kind in ("vol", "bass", "treble"):
+                t = buf.get(f"{kind}_timer")
+                if t: t.cancel()
+                self._resolve(zone, kind, False)
+        self._close()
 
 class Bridge:
     def __init__(self):
         self.client = mqtt.Client(protocol=mqtt.MQTTv5, callback_api_version=mqtt.CallbackAPIVersion.VERSION2)
         if MQTT_USER: self.client.username_pw_set(MQTT_USER, MQTT_PASS)
         self.client.will_set(f"{MQTT_BASE}/bridge/status", "offline", retain=True)
+        self.pub = PublishBuffer(self.client)
         self.sessions = {}
+        self.api: Optional[LocalApiServer] = None
+        self.reload_requested = threading.Event() # set by SIGHUP / MQTT, serviced by the main loop
+        self._reload_requests: list = [] # MQTT messages waiting on the pending reload, for request/response
+        self._reload_lock = threading.Lock()
         # --- INSTRUMENTATION ---
         self._start_time = time.monotonic()
         self._pid = os.getpid()
@@ -460,28 +790,30 @@ class Bridge:
 
     def publish_discovery(self):
         for amp_key in AMPS.keys():
-            avail_t = self._topic(amp_key, "status"); dev = device_block(amp_key)
-            for z in range(1, 9):
-                zname = ZONE_NAMES.get(amp_key, {}).get(z, f"Zone {z}")
-                base = self._topic(amp_key, "zone", z); cmd_base = f"{base}/set"
-                
-                power_cfg = {"name": f"{zname} Power", "uniq_id": zone_object_id(amp_key, z, "power"), "stat_t": f"{base}/power", "cmd_t": f"{cmd_base}/power", "pl_on": "on", "pl_off": "off", "stat_on": "on", "stat_off": "off", "avty_t": avail_t, "device": dev, "optimistic": True}
-                self.client.publish(discovery_topic("switch", zone_object_id(amp_key, z, "power")), json.dumps(power_cfg), retain=True)
+            for z in range(1, 9): self._publish_zone_discovery(amp_key, z)
+
+    def _publish_zone_discovery(self, amp_key: str, z: int):
+        avail_t = self._topic(amp_key, "status"); dev = device_block(amp_key)
+        zname = ZONE_NAMES.get(amp_key, {}).get(z, f"Zone {z}")
+        base = self._topic(amp_key, "zone", z); cmd_base = f"{base}/set"
+        
+        power_cfg = {"name": f"{zname} Power", "uniq_id": zone_object_id(amp_key, z, "power"), "stat_t": f"{base}/power", "cmd_t": f"{cmd_base}/power", "pl_on": "on", "pl_off": "off", "stat_on": "on", "stat_off": "off", "avty_t": avail_t, "device": dev, "optimistic": True}
+        self.pub.publish(discovery_topic("switch", zone_object_id(amp_key, z, "power")), json.dumps(power_cfg), retain=True)
 
-                mute_cfg = {"name": f"{zname} Mute", "uniq_id": zone_object_id(amp_key, z, "mute"), "stat_t": f"{base}/mute", "cmd_t": f"{cmd_base}/mute", "pl_on": "on", "pl_off": "off", "stat_on": "on", "stat_off": "off", "avty_t": avail_t, "device": dev, "optimistic": True}
-                self.client.publish(discovery_topic("switch", zone_object_id(amp_key, z, "mute")), json.dumps(mute_cfg), retain=True)
+        mute_cfg = {"name": f"{zname} Mute", "uniq_id": zone_object_id(amp_key, z, "mute"), "stat_t": f"{base}/mute", "cmd_t": f"{cmd_base}/mute", "pl_on": "on", "pl_off": "off", "stat_on": "on", "stat_off": "off", "avty_t": avail_t, "device": dev, "optimistic": True}
+        self.pub.publish(discovery_topic("switch", zone_object_id(amp_key, z, "mute")), json.dumps(mute_cfg), retain=True)
 
-                vol_cfg = {"name": f"{zname} Volume", "uniq_id": zone_object_id(amp_key, z, "volume"), "stat_t": f"{base}/volume", "cmd_t": f"{cmd_base}/volume", "min": 0, "max": 75, "mode": "slider", "avty_t": avail_t, "device": dev, "val_tpl": "{{ 75 - (value | int) }}", "cmd_tpl": "{{ 75 - (value | int) }}", "optimistic": True}
-                self.client.publish(discovery_topic("number", zone_object_id(amp_key, z, "volume")), json.dumps(vol_cfg), retain=True)
+        vol_cfg = {"name": f"{zname} Volume", "uniq_id": zone_object_id(amp_key, z, "volume"), "stat_t": f"{base}/volume", "cmd_t": f"{cmd_base}/volume", "min": 0, "max": 75, "mode": "slider", "avty_t": avail_t, "device": dev, "val_tpl": "{{ 75 - (value | int) }}", "cmd_tpl": "{{ 75 - (value | int) }}", "optimistic": True}
+        self.pub.publish(discovery_topic("number", zone_object_id(amp_key, z, "volume")), json.dumps(vol_cfg), retain=True)
 
-                source_cfg = {"name": f"{zname} Source", "uniq_id": zone_object_id(amp_key, z, "source"), "stat_t": f"{base}/source", "cmd_t": f"{cmd_base}/source", "options": [str(i) for i in range(1, 9)], "avty_t": avail_t, "device": dev}
-                self.client.publish(discovery_topic("select", zone_object_id(amp_key, z, "source")), json.dumps(source_cfg), retain=True)
-                
-                bass_cfg = {"name": f"{zname} Bass", "uniq_id": zone_object_id(amp_key, z, "bass"), "stat_t": f"{base}/bass", "cmd_t": f"{cmd_base}/bass", "min": -12, "max": 12, "step": 2, "mode": "slider", "avty_t": avail_t, "device": dev, "icon": "mdi:speaker", "optimistic": True}
-                self.client.publish(discovery_topic("number", zone_object_id(amp_key, z, "bass")), json.dumps(bass_cfg), retain=True)
-                
-                treble_cfg = {"name": f"{zname} Treble", "uniq_id": zone_object_id(amp_key, z, "treble"), "stat_t": f"{base}/treble", "cmd_t": f"{cmd_base}/treble", "min": -12, "max": 12, "step": 2, "mode": "slider", "avty_t": avail_t, "device": dev, "icon": "mdi:surround-sound", "optimistic": True}
-                self.client.publish(discovery_topic("number", zone_object_id(amp_key, z, "treble")), json.dumps(treble_cfg), retain=True)
+        source_cfg = {"name": f"{zname} Source", "uniq_id": zone_object_id(amp_key, z, "source"), "stat_t": f"{base}/source", "cmd_t": f"{cmd_base}/source", "options": [str(i) for i in range(1, 9)], "avty_t": avail_t, "device": dev}
+        self.pub.publish(discovery_topic("select", zone_object_id(amp_key, z, "source")), json.dumps(source_cfg), retain=True)
+        
+        bass_cfg = {"name": f"{zname} Bass", "uniq_id": zone_object_id(amp_key, z, "bass"), "stat_t": f"{base}/bass", "cmd_t": f"{cmd_base}/bass", "min": -12, "max": 12, "step": 2, "mode": "slider", "avty_t": avail_t, "device": dev, "icon": "mdi:speaker", "optimistic": True}
+        self.pub.publish(discovery_topic("number", zone_object_id(amp_key, z, "bass")), json.dumps(bass_cfg), retain=True)
+        
+        treble_cfg = {"name": f"{zname} Treble", "uniq_id": zone_object_id(amp_key, z, "treble"), "stat_t": f"{base}/treble", "cmd_t": f"{cmd_base}/treble", "min": -12, "max": 12, "step": 2, "mode": "slider", "avty_t": avail_t, "device": dev, "icon": "mdi:surround-sound", "optimistic": True}
+        self.pub.publish(discovery_topic("number", zone_object_id(amp_key, z, "treble")), json.dumps(treble_cfg), retain=True)
 
     # --- INSTRUMENTATION ---
     def publish_diagnostics(self):
@@ -497,21 +829,21 @@ class Bridge:
             mem_info = self._process.memory_info()
             mem_mb = round(mem_info.rss / (1024 * 1024), 2)
             
-            self.client.publish(self._topic("diagnostics", "cpu_usage_pct"), str(cpu_pct), retain=False)
-            self.client.publish(self._topic("diagnostics", "memory_usage_mb"), str(mem_mb), retain=False)
+            self.pub.publish(self._topic("diagnostics", "cpu_usage_pct"), str(cpu_pct), retain=False, expiry=MSG_EXPIRY_SEC)
+            self.pub.publish(self._topic("diagnostics", "memory_usage_mb"), str(mem_mb), retain=False, expiry=MSG_EXPIRY_SEC)
         except Exception as e:
             log.warning(f"[Bridge] Failed to gather process metrics: {e}")
 
         # 2. Bridge Uptime
         uptime_s = int(time.monotonic() - self._start_time)
-        self.client.publish(self._topic("diagnostics", "uptime_s"), str(uptime_s), retain=True)
+        self.pub.publish(self._topic("diagnostics", "uptime_s"), str(uptime_s), retain=True)
 
         # 3. Individual Amp Connection Status
         amp_statuses = {}
         for name, session in self.sessions.items():
             amp_statuses[name] = "online" if session.connected else "offline"
         
-        self.client.publish(
+        self.pub.publish(
             self._topic("diagnostics", "amp_connection_status"),
             json.dumps(amp_statuses),
             retain=True
@@ -519,19 +851,36 @@ class Bridge:
         
         # 4. Entity Count (using Zones)
         entity_count = len(self.sessions) * 8 # 8 zones per amp
-        self.client.publish(
+        self.pub.publish(
             self._topic("diagnostics", "entity_count"),
             str(entity_count),
             retain=True
         )
         
-        # 5. Heartbeat (re-publish bridge status)
-        self.client.publish(self._topic("bridge","status"), "online", retain=True)
+        # 5. Commands skipped because the amp was already in the requested state
+        self.pub.publish(
+            self._topic("diagnostics", "commands_elided"),
+            str(sum(s.elided_cmds for s in self.sessions.values())),
+            retain=True
+        )
+
+        # 6. Outbound publish buffer. Diagnostics only go out while connected, when the
+        #    buffer is empty, so report the outage-time depth via peak/last_flush.
+        self.pub.publish(
+            self._topic("diagnostics", "publish_buffer"),
+            json.dumps({"depth": self.pub.depth(), "peak": self.pub.peak, "last_flush": self.pub.last_flush,
+                        "superseded": self.pub.superseded, "dropped": self.pub.dropped}),
+            retain=True
+        )
+
+        # 7. Heartbeat (re-publish bridge status)
+        self.pub.publish(self._topic("bridge","status"), "online", retain=True)
     # --- INSTRUMENTATION ---
 
     def _topic(self, *parts) -> str: return "/".join([MQTT_BASE, *[str(p) for p in parts]])
     def start(self):
         self.client.on_connect = self.on_connect; self.client.on_message = self.on_message
+        self.client.on_disconnect = self.on_disconnect
         self.client.connect_async(MQTT_HOST, MQTT_PORT, keepalive=30); self.client.loop_start()
         
         # --- INSTRUMENTATION ---
@@ -543,99 +892,345 @@ class Bridge:
             log.warning(f"[Bridge] Initial psutil call failed: {e}")
         # --- INSTRUMENTATION ---
 
-        for name, addr in AMPS.items():
-            s = AmpSession(name, addr, self.client); self.sessions[name] = s; s.start()
-            log.info(f"Started AmpSession {name} -> {addr[0]}:{addr[1]}")
+        if LOCAL_API_PORT:
+            if web is None: log.warning("[Bridge] LOCAL_API_PORT is set but aiohttp is not installed; local API disabled.")
+            elif not LOCAL_API_TOKEN and LOCAL_API_HOST not in ("127.0.0.1", "::1", "localhost"):
+                log.error(f"[Bridge] Refusing to expose the local API on {LOCAL_API_HOST} without LOCAL_API_TOKEN; local API disabled.")
+            else: self.api = LocalApiServer(self, LOCAL_API_HOST, LOCAL_API_PORT); self.api.start()
+
+        for name, addr in AMPS.items(): self._start_session(name, addr)
+    def _start_session(self, name: str, addr: Tuple[str, int]):
+        s = AmpSession(name, addr, self.pub)
+        if self.api: s.on_state = self.api.publish_state
+        self.sessions[name] = s; s.start()
+        log.info(f"Started AmpSession {name} -> {addr[0]}:{addr[1]}")
     def stop(self):
+        if self.api: self.api.stop()
         for s in self.sessions.values(): s.stop()
         self.client.loop_stop(); self.client.disconnect()
+
+    def snapshot(self) -> dict:
+        return {name: {"connected": s.connected, "zones": s.snapshot()} for name, s in list(self.sessions.items())}
+
+    def all_off(self) -> int:
+        """ALL OFF across every amp; returns how many zones were commanded."""
+        # Only zones not already known to be off are commanded,
+        # and only those get optimistic states for HA's UI
+        changed = 0
+        for s in list(self.sessions.values()):
+            for z in s.all_zones_off():
+                base_t = s._topic("zone", z)
+                self.pub.publish(f"{base_t}/power", "off", retain=True, alias=True)
+                self.pub.publish(f"{base_t}/mute", "off", retain=True, alias=True)
+                changed += 1
+        log.info(f"Sent ALL OFF; optimistically set {changed} zone(s) to OFF")
+        return changed
+
+    def reload(self) -> Optional[dict]:
+        """Re-reads CONFIG_FILE and applies only what changed; runs on the main thread."""
+        with self._reload_lock: reqs, self._reload_requests = self._reload_requests, []
+        try: summary = self._reload()
+        except Exception: traceback.print_exc(); summary = None
+        for req in reqs: self._respond(req, json.dumps(summary) if summary is not None else "err")
+        return summary
+
+    def _reload(self) -> Optional[dict]:
+        global AMPS, ZONE_NAMES
+        if not CONFIG_FILE: log.warning("[Config] Reload requested but BRIDGE_CONFIG is not set."); return None
+        cfg = load_config_file(CONFIG_FILE)
+        if cfg is None: return None
+        new_amps, new_names = cfg["amps"], cfg["zone_names"]
+
+        # Amps whose address changed are restarted; everything else keeps its socket and state
+        removed = [a for a in AMPS if new_amps.get(a) != AMPS[a]]
+        added = [a for a in new_amps if AMPS.get(a) != new_amps[a]]
+        renamed = [(a, z) for a in new_amps if a in AMPS for z in range(1, 9)
+                   if ZONE_NAMES.get(a, {}).get(z) != new_names.get(a, {}).get(z)]
+        # Object ids derive from zone names, so capture the old ones before swapping config
+        stale = {(a, z): [(comp, zone_object_id(a, z, suffix)) for comp, suffix in ZONE_ENTITIES]
+                 for a, z in renamed + [(a, z) for a in AMPS if a not in new_amps for z in range(1, 9)]}
+
+        tuning = apply_tuning(cfg["tuning"])
+        AMPS, ZONE_NAMES = new_amps, new_names
+        if "POLL_INTERVAL_SEC" in tuning:
+            for sess in list(self.sessions.values()): sess.wake.set()
+        if "PUB_BUFFER_MAX" in tuning: self.pub.trim()
+
+        for a in removed:
+            sess = self.sessions.pop(a, None)
+            if sess: sess.stop(); log.info(f"[Config] Stopped AmpSession {a}")
+        for a in added: self._start_session(a, AMPS[a])
+
+        for (a, z), ids in stale.items():
+            keep = {zone_object_id(a, z, suffix) for _, suffix in ZONE_ENTITIES} if a in AMPS else set()
+            for comp, oid in ids:
+                if oid not in keep: self.pub.publish(discovery_topic(comp, oid), "", retain=True)
+        for a in added:
+            for z in range(1, 9): self._publish_zone_discovery(a, z)
+        for a, z in renamed:
+            if a not in added: self._publish_zone_discovery(a, z)
+
+        summary = {"tuning": tuning, "added": added, "removed": removed, "renamed": [f"{a}/{z}" for a, z in renamed]}
+        log.info(f"[Config] Reloaded {CONFIG_FILE}: {summary}")
+        self.pub.publish(self._topic("bridge", "reload_result"), json.dumps(summary), retain=False, expiry=MSG_EXPIRY_SEC)
+        return summary
+
+    def handle_zone_command(self, sess: AmpSession, zone: int, cmd: str, payload: str,
+                            on_done: Optional[Callable[[bool], None]] = None) -> bool:
+        """
+        Shared command path for MQTT and the local API. Returns whether the command
+        was accepted. on_done, if given, is called exactly once with whether it was
+        applied -- for coalesced commands that is only once the flush has run.
+        """
+        amp = sess.amp_name
+        ok = False
+
+        # --- SPEC-SAFE POWER-ON FIX ---
+        if cmd == "power":
+            is_on = payload.lower() in ("1", "on", "true")
+            if is_on:
+                # 'power on' command received
+                # Per the spec, *ZNzzVOLvv* also turns the zone on.
+                # We use this to power on AT the last known volume,
+                # bypassing the amp's "default 45" behavior.
+                
+                # Get last volume from cache, default to a 'safe' 65
+                last_vol = sess._zone_states.get(zone, {}).get("vol_0_75", 65)
+                log.info(f"[{amp}] Power ON for zone {zone} received. Setting volume to {last_vol} to power on.")
+                ok = sess.set_volume(zone, last_vol, on_done)
+            else:
+                # 'power off' command is normal
+                ok = sess.set_power(zone, False)
+        # --- END OF FIX ---
+        
+        elif cmd == "mute": ok = sess.set_mute(zone, payload.lower() in ("1", "on", "true"))
+        elif cmd == "toggle_mute": ok = sess.toggle_mute(zone)
+        elif cmd == "source": ok = sess.set_source(zone, int(payload))
+        elif cmd == "volume": ok = sess.set_volume(zone, int(payload), on_done)
+        elif cmd == "bass": ok = sess.set_bass(zone, int(payload), on_done)
+        elif cmd == "treble": ok = sess.set_treble(zone, int(payload), on_done)
+        elif cmd == "volume_up": ok = sess.volume_up(zone)
+        elif cmd == "volume_down": ok = sess.volume_down(zone)
+        elif cmd == "bass_up": ok = sess.bass_up(zone, on_done)
+        elif cmd == "bass_down": ok = sess.bass_down(zone, on_done)
+        elif cmd == "treble_up": ok = sess.treble_up(zone, on_done)
+        elif cmd == "treble_down": ok = sess.treble_down(zone, on_done)
+
+        # Accepted coalesced commands report from their flush; everything else reports now
+        deferred = cmd in COALESCED_CMDS or (cmd == "power" and payload.lower() in ("1", "on", "true"))
+        if on_done and not (deferred and ok): on_done(ok)
+        return ok
+
     def on_connect(self, client, userdata, flags, rc, props):
         if rc == 0:
             client.subscribe(f"{self._topic('+','zone','+','set','+')}")
             client.subscribe(f"{self._topic('+','raw')}")
             client.subscribe(f"{self._topic('all','command')}")
+            client.subscribe(f"{self._topic('bridge','reload')}")
             client.subscribe("homeassistant/status")
-            client.publish(self._topic("bridge","status"), "online", retain=True); self.publish_discovery()
+            self.pub.on_connected(getattr(props, "TopicAliasMaximum", 0) if props else 0, self._alias_preference())
+            self.pub.publish(self._topic("bridge","status"), "online", retain=True); self.publish_discovery()
             log.info(f"MQTT connected to {MQTT_HOST}:{MQTT_PORT}")
         else: log.error(f"MQTT connect failed code: {rc}")
+    def _alias_preference(self) -> list:
+        """Hottest topics first: every zone's combined JSON (each poll), then volume (slider drags)."""
+        zones = [(s, z) for s in list(self.sessions.values()) for z in range(1, 9)]
+        return [s._topic("zone", z) for s, z in zones] + [s._topic("zone", z, "volume") for s, z in zones]
+
+    def on_disconnect(self, client, userdata, flags, rc, props):
+        self.pub.on_disconnected()
+        log.warning(f"MQTT disconnected: {rc}")
+
+    def _respond(self, msg, payload: str):
+        """MQTT 5 request/response: reply on the command's ResponseTopic, echoing its CorrelationData."""
+        props = getattr(msg, "properties", None)
+        resp_t = getattr(props, "ResponseTopic", None)
+        if not resp_t: return
+        reply = Properties(PacketTypes.PUBLISH)
+        corr = getattr(props, "CorrelationData", None)
+        if corr is not None: reply.CorrelationData = corr
+        self.pub.publish(resp_t, payload, retain=False, expiry=MSG_EXPIRY_SEC, properties=reply)
 
     def on_message(self, client, userdata, msg):
+        replied = threading.Event()
+        def reply(result: str):
+            # Exactly one MQTT 5 response per request, whichever path gets there first
+            if not replied.is_set(): replied.set(); self._respond(msg, result)
         try:
             payload = (msg.payload.decode() if msg.payload else "").strip()
             topic = msg.topic; parts = topic.split("/")
             if "/".join(parts[-2:]) == "all/command":
                 log.info(f"Received master command: {payload}")
-                if payload.upper() == 'OFF':
-                    # First, send the efficient 'ALL OFF' command to each amp
-                    for s in self.sessions.values():
-                        s.all_zones_off_optimistic()
-
-                    # Now, publish optimistic states for HA's UI
-                    for amp_key, s in self.sessions.items():
-                        for z in range(1, 9):
-                            base_t = s._topic("zone", z)
-                            client.publish(f"{base_t}/power", "off", retain=True)
-                            client.publish(f"{base_t}/mute", "off", retain=True)
-                    log.info("Sent ALL OFF command and optimistically set all zones to OFF")
+                if payload.upper() == 'OFF': reply(json.dumps({"zones": self.all_off()}))
+                else: reply("err")
                 return
             if topic == "homeassistant/status" and payload == "online": self.publish_discovery(); return
+            if topic == self._topic("bridge", "reload"):
+                if msg.retain: log.warning("[Config] Ignoring retained reload request."); return
+                with self._reload_lock: self._reload_requests.append(msg)
+                self.reload_requested.set(); return
             if parts[-1] == "raw":
                 sess = self.sessions.get(parts[-2])
-                if sess:
-                    with sess.lock:
-                        if not sess.connected and not sess._connect(): return
-                        sess._send_ascii(payload); time.sleep(POST_SEND_SETTLE)
-                        line = sess._readline(PER_CMD_TIMEOUT)
-                        client.publish(self._topic(parts[-2], "ack", "raw"), line or "", retain=False)
+                if not sess: reply("err"); return
+                with sess.lock:
+                    if not sess.connected and not sess._connect(): reply("err"); return
+                    sess._send_ascii(payload); time.sleep(POST_SEND_SETTLE)
+                    line = sess._readline(PER_CMD_TIMEOUT)
+                self.pub.publish(self._topic(parts[-2], "ack", "raw"), line or "", retain=False, expiry=MSG_EXPIRY_SEC)
+                reply(line or "")
                 return
             if len(parts) < 7 or parts[3] != "zone" or parts[5] != "set": return
             amp, zone, cmd = parts[2], int(parts[4]), parts[6].lower()
             sess = self.sessions.get(amp)
-            if not sess: return
-            ok = False
-
-            # --- SPEC-SAFE POWER-ON FIX ---
-            if cmd == "power":
-                is_on = payload.lower() in ("1", "on", "true")
-                if is_on:
-                    # 'power on' command received
-                    # Per the spec, *ZNzzVOLvv* also turns the zone on.
-                    # We use this to power on AT the last known volume,
-                    # bypassing the amp's "default 45" behavior.
-                    
-                    # Get last volume from cache, default to a 'safe' 65
-                    last_vol = sess._zone_states.get(zone, {}).get("vol_0_75", 65)
-                    log.info(f"[{amp}] Power ON for zone {zone} received. Setting volume to {last_vol} to power on.")
-                    ok = sess.set_volume(zone, last_vol)
-                else:
-                    # 'power off' command is normal
-                    ok = sess.set_power(zone, False)
-            # --- END OF FIX ---
-            
-            elif cmd == "mute": ok = sess.set_mute(zone, payload.lower() in ("1", "on", "true"))
-            elif cmd == "toggle_mute": ok = sess.toggle_mute(zone)
-            elif cmd == "source": ok = sess.set_source(zone, int(payload))
-            elif cmd == "volume": ok = sess.set_volume(zone, int(payload))
-            elif cmd == "bass": ok = sess.set_bass(zone, int(payload))
-            elif cmd == "treble": ok = sess.set_treble(zone, int(payload))
-            elif cmd == "volume_up": ok = sess.volume_up(zone)
-            elif cmd == "volume_down": ok = sess.volume_down(zone)
-            elif cmd == "bass_up": ok = sess.bass_up(zone)
-            elif cmd == "bass_down": ok = sess.bass_down(zone)
-            elif cmd == "treble_up": ok = sess.treble_up(zone)
-            elif cmd == "treble_down": ok = sess.treble_down(zone)
-            client.publish(self._topic(amp, "zone", "ack", cmd), "ok" if ok else "err", retain=False)
-        except Exception: traceback.print_exc()
+            if not sess: reply("err"); return
+            ok = self.handle_zone_command(sess, zone, cmd, payload, on_done=lambda applied: reply("ok" if applied else "err"))
+            # Legacy ack means "accepted"; the MQTT 5 reply above means "applied"
+            self.pub.publish(self._topic(amp, "zone", "ack", cmd), "ok" if ok else "err", retain=False, expiry=MSG_EXPIRY_SEC)
+        except Exception:
+            traceback.print_exc()
+            try: reply("err")
+            except Exception: pass
+
+class LocalApiServer(threading.Thread):
+    """
+    Embedded HTTP + WebSocket API for local clients (wall panels, scripts).
+    Runs its own asyncio loop; amp commands are run in the default executor
+    so the blocking AmpSession paths never stall the loop.
+
+      GET  /api/state    -> {"amp1": {"connected": true, "zones": {"1": {...}}}, ...}
+      POST /api/command  -> {"amp": "amp1", "zone": 3, "cmd": "volume", "value": 40}
+      GET  /api/ws       -> snapshot on connect, then {"type": "state", ...} diffs;
+                            send command objects (optional "id") to get {"type": "ack", ...}
+    """
+    def __init__(self, bridge: "Bridge", host: str, port: int):
+        super().__init__(daemon=True)
+        self.bridge = bridge
+        self.host, self.port = host, port
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: dict = {} # WebSocketResponse -> outbound asyncio.Queue
+
+    def run(self):
+        self.loop = asyncio.new_event_loop(); asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get("/api/state", self._handle_state)
+        app.router.add_post("/api/command", self._handle_command)
+        app.router.add_get("/api/ws", self._handle_ws)
+        runner = web.AppRunner(app, access_log=None)
+        self.loop.run_until_complete(runner.setup())
+        try:
+            self.loop.run_until_complete(web.TCPSite(runner, self.host, self.port).start())
+        except OSError as e:
+            log.error(f"[LocalAPI] could not listen on {self.host}:{self.port}: {e}")
+            return
+        log.info(f"[LocalAPI] listening on {self.host}:{self.port}")
+        try: self.loop.run_forever()
+        finally: self.loop.run_until_complete(runner.cleanup())
+
+    def stop(self):
+        if self.loop and self.loop.is_running(): self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def publish_state(self, amp: str, zone: int, diff: dict):
+        """Thread-safe; called by AmpSession whenever a zone's state changes."""
+        if not self.loop or not self._clients: return
+        msg = json.dumps({"type": "state", "amp": amp, "zone": zone, "state": diff, "ts": round(time.time(), 3)}, separators=(",", ":"))
+        self.loop.call_soon_threadsafe(self._broadcast, msg)
+
+    def _broadcast(self, msg: str):
+        for ws, q in list(self._clients.items()):
+            try: q.put_nowait(msg)
+            except asyncio.QueueFull:
+                log.warning("[LocalAPI] dropping slow WebSocket client")
+                self._clients.pop(ws, None); asyncio.ensure_future(ws.close())
+
+    def _check_auth(self, request):
+        if not LOCAL_API_TOKEN: return
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ").strip() or request.query.get("token", "")
+        if not hmac.compare_digest(given.encode(), LOCAL_API_TOKEN.encode()): raise web.HTTPUnauthorized()
+
+    async def _run_command(self, data: dict) -> dict:
+        ack = {"type": "ack", "id": data.get("id"), "ok": False}
+        try:
+            amp, cmd = str(data.get("amp", "")), str(data.get("cmd", "")).lower()
+            if amp == "all":
+                if cmd != "off": return {**ack, "error": "unknown command"}
+                changed = await self.loop.run_in_executor(None, self.bridge.all_off)
+                return {**ack, "ok": True, "zones": changed}
+            sess = self.bridge.sessions.get(amp)
+            if not sess: return {**ack, "error": "unknown amp"}
+            zone, payload = int(data.get("zone", 0)), str(data.get("value", "")).strip()
+            if not 1 <= zone <= 8: return {**ack, "error": "bad zone"}
+            ok = await self.loop.run_in_executor(None, self.bridge.handle_zone_command, sess, zone, cmd, payload)
+            return {**ack, "ok": bool(ok)}
+        except Exception as e:
+            return {**ack, "error": str(e)}
+
+    async def _handle_state(self, request):
+        self._check_auth(request)
+        return web.json_response(self.bridge.snapshot())
+
+    async def _handle_command(self, request):
+        self._check_auth(request)
+        try: data = await request.json()
+        except Exception: raise web.HTTPBadRequest(text="invalid JSON")
+        if not isinstance(data, dict): raise web.HTTPBadRequest(text="expected a JSON object")
+        ack = await self._run_command(data)
+        return web.json_response(ack, status=200 if ack["ok"] or "error" not in ack else 400)
+
+    async def _handle_ws(self, request):
+        self._check_auth(request)
+        ws = web.WebSocketResponse(heartbeat=30.0)
+        await ws.prepare(request)
+        q: asyncio.Queue = asyncio.Queue(maxsize=LOCAL_API_CLIENT_QUEUE)
+        # Register before taking the snapshot so no diff can fall between the two
+        self._clients[ws] = q
+        await ws.send_str(json.dumps({"type": "snapshot", "amps": self.bridge.snapshot()}, separators=(",", ":")))
+
+        async def pump():
+            while True: await ws.send_str(await q.get())
+
+        def send(reply: dict):
+            try: q.put_nowait(json.dumps(reply, separators=(",", ":")))
+            except asyncio.QueueFull: pass
+
+        async def command(data: dict):
+            send(await self._run_command(data))
+
+        sender = asyncio.ensure_future(pump())
+        tasks: set = set() # keep references so in-flight commands aren't garbage-collected
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT: continue
+                try: data = json.loads(msg.data)
+                except ValueError: data = None
+                if not isinstance(data, dict):
+                    send({"type": "ack", "ok": False, "error": "invalid JSON"}); continue
+                task = asyncio.ensure_future(command(data))
+                tasks.add(task); task.add_done_callback(tasks.discard)
+        except Exception as e:
+            log.debug(f"[LocalAPI] WebSocket error: {e}")
+        finally:
+            self._clients.pop(ws, None); sender.cancel()
+            for task in tasks: task.cancel()
+        return ws
 
 def main():
+    global AMPS, ZONE_NAMES
+    if CONFIG_FILE:
+        cfg = load_config_file(CONFIG_FILE)
+        if cfg: AMPS, ZONE_NAMES = cfg["amps"], cfg["zone_names"]; apply_tuning(cfg["tuning"])
     bridge = Bridge()
     def _graceful(sig, frame): log.info(f"Signal {sig} received; stopping…"); bridge.stop(); sys.exit(0)
     signal.signal(signal.SIGINT, _graceful); signal.signal(signal.SIGTERM, _graceful)
+    signal.signal(signal.SIGHUP, lambda sig, frame: bridge.reload_requested.set())
     try:
         bridge.start();
         # --- INSTRUMENTATION ---
         # The main thread is now the diagnostics publisher
         while True: 
+            if bridge.reload_requested.is_set():
+                bridge.reload_requested.clear()
+                try: bridge.reload()
+                except Exception: traceback.print_exc()
             now = time.monotonic()
             if (now - bridge._last_diag_pub_time) > HEALTH_CHECK_INTERVAL:
                 bridge.publish_diagnostics()